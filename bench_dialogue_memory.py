@@ -0,0 +1,83 @@
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+
+from dialogue_model import Student
+
+WORDS = ("the", "student", "asked", "about", "budget", "language", "plan", "sequence", "feature",
+         "supplier", "funding", "practice", "daily", "goal", "number", "pattern", "answer", "idea")
+# Task C students practise other languages, so some rounds contain non-ASCII text.
+FOREIGN_WORDS = ("español", "café", "über", "日本語", "こんにちは", "你好")
+
+def synthetic_corpus(students: int, rounds: int, seed: int = 0) -> str:
+    """Builds an interchange file (as a JSON string) in the format written by process_data.py."""
+    rng = random.Random(seed)
+
+    def text(n):
+        words = [rng.choice(WORDS) for _ in range(n)]
+        if rng.random() < 0.05:
+            words[rng.randrange(n)] = rng.choice(FOREIGN_WORDS)
+        return " ".join(words)
+
+    records = []
+    for i in range(1, students + 1):
+        records.append({
+            "student_id": str(i),
+            "dialogue_history": [
+                {"student_prompt": text(rng.randint(5, 40)), "gpt_response": text(rng.randint(40, 200)), "round": r + 1}
+                for r in range(rng.randint(rounds // 2, rounds))
+            ],
+            "final_submission": text(30),
+            "task_type": rng.choice("ABC"),
+        })
+    return json.dumps(records)
+
+def measure(build):
+    """Returns the memory retained by the object that build() returns, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def main():
+    """
+    Compares the memory held by the dialogue histories as a list of dicts
+    (json.load) and as compact Student objects.
+    """
+    parser = argparse.ArgumentParser(description="Measure the memory used by dialogue histories.")
+    parser.add_argument("--students", type=int, default=2000, help="Number of synthetic students (default: 2000).")
+    parser.add_argument("--rounds", type=int, default=60, help="Maximum rounds per student (default: 60).")
+    args = parser.parse_args()
+
+    print(f"Generating a synthetic corpus of {args.students} students with up to {args.rounds} rounds...")
+    raw = synthetic_corpus(args.students, args.rounds)
+    print(f"Interchange file size: {len(raw) / 2**20:.1f} MiB\n")
+
+    dicts, dict_bytes = measure(lambda: json.loads(raw))
+    rounds = sum(len(r["dialogue_history"]) for r in dicts)
+
+    def build_students():
+        records = json.loads(raw)
+        students = []
+        for i, record in enumerate(records):
+            students.append(Student.from_record(record))
+            records[i] = None
+        return students
+
+    del dicts
+    students, student_bytes = measure(build_students)
+    assert sum(len(s) for s in students) == rounds
+
+    print(f"{'Representation':<20} | {'Memory':<12} | {'Per round'}")
+    print("-" * 50)
+    print(f"{'list of dicts':<20} | {dict_bytes / 2**20:>8.1f} MiB | {dict_bytes / rounds:>6.0f} B")
+    print(f"{'Student objects':<20} | {student_bytes / 2**20:>8.1f} MiB | {student_bytes / rounds:>6.0f} B")
+    print(f"\nMemory reduction: {100 * (1 - student_bytes / dict_bytes):.1f}% over {rounds} rounds.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Subcommands that must start quickly: they only print help or usage text.
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["process", "--help"],
+    ["merge-answers", "--help"],
+    ["evaluate", "--help"],
+    ["similarity", "--help"],
+    ["convert", "--help"],
+    ["watch", "--help"],
+    ["mock-server", "--help"],
+    ["debug-parse"],
+]
+
+# Packages that take seconds to import and must not be loaded by a light subcommand.
+HEAVY_MODULES = ["openai", "sentence_transformers", "torch", "transformers", "pandas", "docx"]
+
+# Runs cli.py in-process and reports which heavy modules ended up imported.
+RUNNER = """
+import contextlib, io, json, runpy, sys
+sys.argv = sys.argv[1:]
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        runpy.run_path(sys.argv[0], run_name="__main__")
+    except SystemExit:
+        pass
+heavy = {heavy}
+print(json.dumps(sorted(m for m in heavy if m in sys.modules)))
+"""
+
+def time_command(cli_path, args, repeat):
+    """Returns the best wall time over `repeat` runs and the heavy modules that were imported."""
+    code = RUNNER.format(heavy=repr(HEAVY_MODULES))
+    best, loaded = None, []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code, cli_path] + args,
+                                capture_output=True, text=True, cwd=os.path.dirname(cli_path))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        lines = result.stdout.strip().splitlines()
+        loaded = json.loads(lines[-1]) if lines else ["<no output: " + result.stderr.strip()[-200:] + ">"]
+    return best, loaded
+
+def main():
+    """
+    Measures the startup time of the light cli.py subcommands and fails if any
+    of them exceeds the import budget or imports a heavy dependency.
+    """
+    parser = argparse.ArgumentParser(description="Check the startup time of light cli.py subcommands.")
+    parser.add_argument("--budget", type=float, default=0.5,
+                        help="Maximum wall time in seconds for a light subcommand (default: 0.5).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per subcommand; the best time is used (default: 3).")
+    args = parser.parse_args()
+
+    cli_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    baseline = time.perf_counter() - start
+
+    print(f"Interpreter startup: {baseline:.3f}s, budget per subcommand: {args.budget:.3f}s\n")
+    print(f"{'Command':<28} | {'Time':<8} | {'Status'}")
+    print("-" * 60)
+
+    failures = 0
+    for command in LIGHT_COMMANDS:
+        elapsed, loaded = time_command(cli_path, command, args.repeat)
+        if loaded:
+            status = f"❌ imported {', '.join(loaded)}"
+        elif elapsed > args.budget:
+            status = "❌ over budget"
+        else:
+            status = "✅ OK"
+        failures += not status.startswith("✅")
+        print(f"{' '.join(command):<28} | {elapsed:.3f}s | {status}")
+
+    if failures:
+        print(f"\n❌ {failures} subcommands failed the startup check.")
+        sys.exit(1)
+    print("\n✅ All light subcommands are within the startup budget.")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import json
-from sentence_transformers import SentenceTransformer, util
 import os
 
+from dialogue_model import GPT, STUDENT, as_student, load_corpus
+
 def calculate_similarity(model, text1, text2):
     """Calculates the cosine similarity between two texts."""
+    from sentence_transformers import util
     # If either text is empty, similarity is not meaningful.
     if not text1 or not text2:
         return 0.0
@@ -14,26 +16,37 @@ def calculate_similarity(model, text1, text2):
     cosine_scores = util.cos_sim(embedding1, embedding2)
     return cosine_scores.item()
 
-def extract_texts(dialogue_history: list) -> (str, str):
+def extract_texts(dialogue_history) -> (str, str):
     """
     Extracts and separates all student text and all GPT text from the clean dialogue.
     """
-    student_texts = []
-    gpt_texts = []
+    dialogue = as_student(dialogue_history)
+    return " ".join(dialogue.texts(STUDENT)), " ".join(dialogue.texts(GPT))
+
+def score_student(model, student) -> dict:
+    """Calculates the similarity record for a single student (a Student or a record dict)."""
+    student = as_student(student)
 
-    for turn in dialogue_history:
-        if turn.get("student"):
-            student_texts.append(turn["student"])
-        if turn.get("gpt"):
-            gpt_texts.append(turn["gpt"])
+    # Extract all student text and all GPT text from the dialogue
+    student_text, gpt_text = extract_texts(student)
 
-    return " ".join(student_texts), " ".join(gpt_texts)
+    # Only calculate similarity if both parties have contributed text
+    if student_text and gpt_text:
+        score = calculate_similarity(model, student_text, gpt_text)
+    else:
+        score = 0.0
 
+    return {
+        "student_id": student.student_id,
+        "task_type": student.task_type,
+        "similarity_score": round(score, 4)
+    }
 
 def main():
     """
     Main function to load data, process it, and save similarity scores.
     """
+    from sentence_transformers import SentenceTransformer
     print("Loading sentence transformer model...")
     model = SentenceTransformer('all-MiniLM-L6-v2')
     print("Model loaded.")
@@ -44,33 +57,15 @@ def main():
         print(f"Error: Input file not found at {input_json_path}")
         return
 
-    with open(input_json_path, 'r', encoding='utf-8') as f:
-        student_data = json.load(f)
+    student_data = load_corpus(input_json_path)
 
     similarity_results = []
 
     print(f"Processing {len(student_data)} students...")
     for student in student_data:
-        task_type = student.get("task_type")
-        student_id = student.get("student_id")
-        dialogue_history = student.get("dialogue_history", [])
-        
-        # Extract all student text and all GPT text from the dialogue
-        student_text, gpt_text = extract_texts(dialogue_history)
-        
-        # Only calculate similarity if both parties have contributed text
-        if student_text and gpt_text:
-            score = calculate_similarity(model, student_text, gpt_text)
-        else:
-            score = 0.0
-        
-        similarity_results.append({
-            "student_id": student_id,
-            "task_type": task_type,
-            "similarity_score": round(score, 4)
-        })
-        
-        print(f"  - Calculated similarity for student {student_id} (Task {task_type}): {score:.4f}")
+        result = score_student(model, student)
+        similarity_results.append(result)
+        print(f"  - Calculated similarity for student {result['student_id']} (Task {result['task_type']}): {result['similarity_score']:.4f}")
 
     output_json_path = "student_similarity_scores.json"
     with open(output_json_path, 'w', encoding='utf-8') as f:
@@ -0,0 +1,61 @@
+import sys
+from importlib import import_module
+
+# Subcommand name -> (module, function, description). Modules are only imported
+# when their subcommand runs, so heavy dependencies (openai, torch via
+# sentence-transformers, pandas) are never loaded for other subcommands.
+COMMANDS = {
+    "process": ("process_data", "main", "Extract dialogues and answers from the cleaned .docx files."),
+    "merge-answers": ("merge_answers", "main", "Merge the cleaned answers into final_project_data.json."),
+    "evaluate": ("evaluate_results_llm", "main", "Evaluate student submissions with the LLM."),
+    "similarity": ("calculate_similarity", "main", "Calculate student/AI text similarity scores."),
+    "convert": ("convert_to_excel", "convert_json_to_excel", "Convert the JSON results to CSV files."),
+    "verify": ("verify_rounds", "verify_prompt_counts", "Compare round counts with 'Raw Data.xlsx'."),
+    "debug-parse": ("debug_parser", "main", "Show how one student's conversation file is parsed."),
+    "watch": ("watch_data", "main", "Watch the transcript folders and update outputs incrementally."),
+    "mock-server": ("mock_llm_server", "main", "Run a local mock LLM server with random delays."),
+}
+
+# Subcommands whose scripts read their own options from sys.argv. The others
+# take no options, so the dispatcher answers --help for them itself; passing
+# the flag on would run the whole stage.
+PARSES_OWN_ARGS = {"evaluate", "verify", "debug-parse", "watch", "mock-server"}
+
+def print_usage(stream=sys.stdout):
+    print("Usage: python cli.py <command> [options]\n", file=stream)
+    print("Commands:", file=stream)
+    for name, (_, _, description) in COMMANDS.items():
+        print(f"  {name:<15} {description}", file=stream)
+    print("\nRun 'python cli.py <command> --help' for the options of a command.", file=stream)
+
+def main(argv=None):
+    """
+    Single entry point for all project scripts. The first argument selects the
+    script; the remaining arguments are passed on to it unchanged.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"Error: Unknown command '{command}'.\n", file=sys.stderr)
+        print_usage(sys.stderr)
+        return 2
+
+    module_name, function_name, description = COMMANDS[command]
+    if command not in PARSES_OWN_ARGS and rest:
+        if rest[0] in ("-h", "--help"):
+            print(f"Usage: python cli.py {command}\n\n{description}\n\nThis command takes no options.")
+            return 0
+        print(f"Error: '{command}' takes no options (got: {' '.join(rest)}).", file=sys.stderr)
+        return 2
+
+    # The scripts read their own arguments from sys.argv.
+    sys.argv = [f"cli.py {command}"] + rest
+    function = getattr(import_module(module_name), function_name)
+    function()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 import json
-import pandas as pd
 import os
 
 def convert_json_to_excel():
@@ -7,6 +6,8 @@ def convert_json_to_excel():
     Loads the two final JSON result files (evaluations and similarities),
     and saves them as two separate sheets in a single Excel file.
     """
+    import pandas as pd
+
     eval_json_path = "student_evaluation_llm.json"
     sim_json_path = "student_similarity_scores.json"
     output_excel_path = "final_project_results.xlsx"
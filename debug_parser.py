@@ -1,13 +1,14 @@
 import os
 import sys
-from docx import Document
 import re
 
-def parse_dialogue_debug(doc_path):
+def parse_dialogue_debug(doc_path, verbose=True):
     """
     Parses a .docx file and prints all raw paragraphs for debugging,
-    then extracts the conversation history.
+    then extracts the conversation history. Pass verbose=False to only
+    parse, e.g. when comparing parsers over the whole corpus.
     """
+    from docx import Document
     try:
         doc = Document(doc_path)
         paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
@@ -15,11 +16,15 @@ def parse_dialogue_debug(doc_path):
         print(f"Error reading {doc_path}: {e}")
         return []
 
-    print("--- RAW PARAGRAPHS READ FROM DOCX ---")
-    for i, p in enumerate(paragraphs):
-        print(f"[{i+1}]: {p}")
-    print("-------------------------------------\n")
+    if verbose:
+        print("--- RAW PARAGRAPHS READ FROM DOCX ---")
+        for i, p in enumerate(paragraphs):
+            print(f"[{i+1}]: {p}")
+        print("-------------------------------------\n")
+    return parse_dialogue_paragraphs(paragraphs)
 
+def parse_dialogue_paragraphs(paragraphs):
+    """Extracts the conversation history from the non-empty, stripped paragraphs of a file."""
     dialogue_history = []
     student_text = []
     gpt_text = []
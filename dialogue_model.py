@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+# Role markers shared by every round, instead of one key string per dict.
+STUDENT = sys.intern("student")
+GPT = sys.intern("gpt")
+
+# The two key conventions found in the interchange files: process_data.py writes
+# "student_prompt"/"gpt_response", the debug parser and older files use "student"/"gpt".
+ROLE_KEYS = {
+    STUDENT: ("student_prompt", "student"),
+    GPT: ("gpt_response", "gpt"),
+}
+
+def _turn_text(turn: Dict, role: str) -> str:
+    for key in ROLE_KEYS[role]:
+        value = turn.get(key)
+        if value:
+            return value
+    return ""
+
+class Round:
+    """A view of one dialogue round. The text is decoded from the owning Student on access."""
+    __slots__ = ("_owner", "_index")
+
+    def __init__(self, owner: "Student", index: int):
+        self._owner = owner
+        self._index = index
+
+    @property
+    def round(self) -> int:
+        return self._index + 1
+
+    @property
+    def student(self) -> str:
+        return self._owner._slice(2 * self._index)
+
+    @property
+    def gpt(self) -> str:
+        return self._owner._slice(2 * self._index + 1)
+
+    def view(self, role: str) -> memoryview:
+        """Returns the UTF-8 bytes of one role's text without copying them."""
+        return self._owner._view(2 * self._index + (0 if role == STUDENT else 1))
+
+    def to_dict(self) -> Dict[str, Union[str, int]]:
+        """Returns the round in the format written by process_data.py."""
+        return {"student_prompt": self.student, "gpt_response": self.gpt, "round": self.round}
+
+    def __repr__(self) -> str:
+        return f"Round({self.round}, student={self.student[:30]!r}, gpt={self.gpt[:30]!r})"
+
+class Student:
+    """
+    A student record with its dialogue stored compactly: all round texts are
+    concatenated into one UTF-8 buffer, and an array of byte offsets marks
+    where each student and GPT turn starts. UTF-8 keeps mostly-English text at
+    one byte per character even when a few rounds contain other scripts, which
+    a single concatenated str would not. Iterating yields Round views.
+    """
+    __slots__ = ("student_id", "task_type", "final_submission", "_text", "_offsets")
+
+    def __init__(self, student_id: str, task_type: Optional[str], final_submission: Optional[str],
+                 turns: Iterable[tuple] = ()):
+        self.student_id = student_id
+        self.task_type = task_type
+        self.final_submission = final_submission
+        parts = []
+        offsets = array("I", [0])
+        position = 0
+        for student_text, gpt_text in turns:
+            for text in (student_text, gpt_text):
+                data = text.encode("utf-8")
+                parts.append(data)
+                position += len(data)
+                offsets.append(position)
+        self._text = b"".join(parts)
+        self._offsets = offsets
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "Student":
+        """Builds a Student from an interchange-file record, whichever key convention it uses."""
+        student_id = record.get("student_id")
+        return cls(
+            str(student_id) if student_id is not None else None,
+            record.get("task_type"),
+            record.get("final_submission"),
+            ((_turn_text(turn, STUDENT), _turn_text(turn, GPT)) for turn in record.get("dialogue_history") or []),
+        )
+
+    def _view(self, i: int) -> memoryview:
+        return memoryview(self._text)[self._offsets[i]:self._offsets[i + 1]]
+
+    def _slice(self, i: int) -> str:
+        return str(self._view(i), "utf-8")
+
+    def __len__(self) -> int:
+        return (len(self._offsets) - 1) // 2
+
+    def __iter__(self) -> Iterator[Round]:
+        for i in range(len(self)):
+            yield Round(self, i)
+
+    def __getitem__(self, index: int) -> Round:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("round index out of range")
+        return Round(self, index)
+
+    def texts(self, role: str) -> List[str]:
+        """Returns the non-empty texts of one role, in round order."""
+        start = 0 if role == STUDENT else 1
+        offsets = self._offsets
+        return [self._slice(i) for i in range(start, len(offsets) - 1, 2) if offsets[i + 1] > offsets[i]]
+
+    def to_record(self) -> Dict:
+        """Returns the record in the format written by process_data.py."""
+        return {
+            "student_id": self.student_id,
+            "dialogue_history": [turn.to_dict() for turn in self],
+            "final_submission": self.final_submission,
+            "task_type": self.task_type,
+        }
+
+    def __repr__(self) -> str:
+        return f"Student({self.student_id!r}, task_type={self.task_type!r}, rounds={len(self)})"
+
+def as_student(record: Union[Student, Dict, List[Dict]]) -> Student:
+    """Accepts a Student, a student record or a bare dialogue_history list."""
+    if isinstance(record, Student):
+        return record
+    if isinstance(record, list):
+        return Student(None, None, None, ((_turn_text(t, STUDENT), _turn_text(t, GPT)) for t in record))
+    return Student.from_record(record)
+
+class Corpus:
+    """
+    All students of an interchange file. The file is only read on first
+    access, and the parsed JSON is dropped once each record has been
+    converted to a Student.
+    """
+    __slots__ = ("path", "_students", "_by_id")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._students = None
+        self._by_id = None
+
+    def _load(self) -> List[Student]:
+        if self._students is None:
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+            students = []
+            for i, record in enumerate(records):
+                students.append(Student.from_record(record))
+                records[i] = None
+            self._students = students
+            self._by_id = {s.student_id: s for s in students}
+        return self._students
+
+    def __iter__(self) -> Iterator[Student]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def get(self, student_id) -> Optional[Student]:
+        self._load()
+        return self._by_id.get(str(student_id))
+
+_corpus_cache: Dict[str, tuple] = {}
+
+def load_corpus(path: str) -> Corpus:
+    """
+    Returns the Corpus for an interchange file. Stages running in the same
+    process share one instance until the file changes on disk.
+    """
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    cached = _corpus_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, Corpus(key))
+        _corpus_cache[key] = cached
+    return cached[1]
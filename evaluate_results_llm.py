@@ -1,9 +1,14 @@
-import openai
+import argparse
 import json
 import os
+import socket
 import sys
+import threading
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Tuple
+
+from dialogue_model import as_student, load_corpus
 
 def get_openai_api_key():
     """Reads the OpenAI API key from openai_key.txt."""
@@ -18,27 +23,332 @@ def get_openai_api_key():
         print("Error: openai_key.txt not found. Please create this file and paste your API key in it.")
         sys.exit(1)
 
-api_key = get_openai_api_key()
-client = openai.OpenAI(api_key=api_key)
+# The client is created on first use so that importing this module (e.g. for
+# --help or from other scripts) does not need the key or the openai package.
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Returns the OpenAI client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import openai
+            _client = openai.OpenAI(api_key=get_openai_api_key())
+    return _client
+
+# Running totals of what was actually sent to the API, used for the packing report.
+usage_stats = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+# Streaming/hedging settings, filled in from the command line by main().
+stream_settings = {
+    "enabled": False,
+    "hedge": False,
+    "first_token_timeout": 30.0,
+    "total_timeout": 120.0,
+    "hedge_percentile": 95.0,
+    "hedge_min_samples": 5,
+    "hedge_default_delay": 20.0,
+}
+
+# Latency and hedging statistics for streamed calls.
+latency_stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "failures": 0, "latencies": []}
+
+SYSTEM_MESSAGE = """
+You are an expert evaluator assessing a student's submission based on a set of requirements. Your goal is to provide a structured, objective evaluation in JSON format. The evaluation should contain two main keys: "score" and "feedback".
+- "score": An integer from 0 to 100, where 0 is a complete failure and 100 is a perfect submission meeting all requirements.
+- "feedback": A detailed string explaining the score. It should cite specific examples from the student's submission and the conversation history to justify the rating. Explain what the student did well and what they missed or could have done better.
 
-def get_completion(prompt: List[Dict[str, str]], model: str = "gpt-4-1106-preview") -> str:
-    """Sends a prompt to the OpenAI API and gets a completion."""
+Analyze the provided conversation history to understand the context of the student's submission. Did the student effectively use the AI's help? Did they iterate and improve? Mention this in your feedback.
+"""
+
+PACKED_SYSTEM_MESSAGE = SYSTEM_MESSAGE + """
+You will be given several student submissions for the same task. Evaluate each student independently, as if they were the only submission you had seen.
+Respond with a JSON object containing a single key "evaluations" whose value is an array with exactly one entry per student. Each entry must have the keys "student_id" (copied exactly as given), "score" and "feedback".
+"""
+
+# No request sets max_tokens, so a completion is bounded by the model's own
+# output limit, which is 4096 tokens for the default model. A detailed feedback
+# entry takes roughly ESTIMATED_TOKENS_PER_EVALUATION of them, and packs are
+# kept small enough that the whole "evaluations" array fits in one completion.
+COMPLETION_TOKEN_LIMIT = 4096
+ESTIMATED_TOKENS_PER_EVALUATION = 400
+
+def get_completion(prompt: List[Dict[str, str]], model: str = "gpt-4-1106-preview", details: Dict[str, Any] = None) -> str:
+    """
+    Sends a prompt to the OpenAI API and gets a completion. If a details dict
+    is given, the completion's finish_reason is stored in it.
+    """
+    if stream_settings["enabled"]:
+        return get_completion_streaming(prompt, model, details)
+    import openai
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=model,
             messages=prompt,
             temperature=0.1,
             response_format={"type": "json_object"}
         )
+        usage_stats["requests"] += 1
+        if getattr(response, "usage", None):
+            usage_stats["prompt_tokens"] += response.usage.prompt_tokens or 0
+            usage_stats["completion_tokens"] += response.usage.completion_tokens or 0
+        if details is not None:
+            details["finish_reason"] = response.choices[0].finish_reason
         return response.choices[0].message.content
     except openai.RateLimitError:
         print("Rate limit exceeded. Waiting 60 seconds...")
         time.sleep(60)
-        return get_completion(prompt, model)
+        return get_completion(prompt, model, details)
     except Exception as e:
         print(f"API call error: {e}")
         return json.dumps({"error": f"API Call Failed: {str(e)}"})
 
+class StreamCancelled(Exception):
+    """Raised inside a streaming attempt when another attempt has already won."""
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the pct-th percentile of values using linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class StreamAttempt:
+    """
+    One streamed request. A hedged attempt gets its own HTTP connection, so
+    that the controlling thread can abort it: closing a socket does not wake a
+    thread that is blocked reading from it, so cancel() shuts the attempt's
+    sockets down, which makes the pending read fail at once and closes the
+    request on the server side. On the shared, pooled connection that would
+    also break unrelated requests, so this costs a new TCP/TLS handshake and
+    is only done when hedging. The sockets are picked up through the HTTP
+    client's trace hook.
+    """
+
+    def __init__(self, own_connection: bool = True):
+        import openai
+        self.cancel_event = threading.Event()
+        self._sockets = []
+        self._lock = threading.Lock()
+        self.http_client = None
+        if not own_connection:
+            self.client = get_client()
+            return
+        self.http_client = openai.DefaultHttpxClient(event_hooks={"request": [self._add_trace]})
+        # Hedging replaces the SDK's own retries; a cancelled attempt must not be retried.
+        self.client = get_client().with_options(http_client=self.http_client, max_retries=0)
+
+    def _add_trace(self, request) -> None:
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event != "connection.connect_tcp.complete":
+            return
+        sock = info["return_value"].get_extra_info("socket")
+        with self._lock:
+            self._sockets.append(sock)
+            cancelled = self.cancel_event.is_set()
+        if cancelled:
+            self._shutdown(sock)
+
+    @staticmethod
+    def _shutdown(sock) -> None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def cancel(self) -> None:
+        """Aborts the request from any thread."""
+        with self._lock:
+            self.cancel_event.set()
+            sockets = list(self._sockets)
+        for sock in sockets:
+            self._shutdown(sock)
+
+    def close(self) -> None:
+        if self.http_client is not None:
+            self.http_client.close()
+
+def stream_completion(prompt: List[Dict[str, str]], model: str, attempt: StreamAttempt) -> Tuple[str, Any]:
+    """
+    Streams a single completion and returns its text and finish_reason. The
+    first-token timeout is applied as the HTTP read timeout, and the total
+    timeout is checked as chunks arrive. Token usage is requested in the
+    final chunk. Stops early if the attempt is cancelled.
+    """
+    start = time.monotonic()
+    parts = []
+    finish_reason = None
+    try:
+        stream = attempt.client.chat.completions.create(
+            model=model,
+            messages=prompt,
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=stream_settings["first_token_timeout"],
+        )
+        usage_stats["requests"] += 1
+        try:
+            for chunk in stream:
+                if attempt.cancel_event.is_set():
+                    raise StreamCancelled()
+                if time.monotonic() - start > stream_settings["total_timeout"]:
+                    raise TimeoutError(f"Completion exceeded total timeout of {stream_settings['total_timeout']}s")
+                if getattr(chunk, "usage", None):
+                    usage_stats["prompt_tokens"] += chunk.usage.prompt_tokens or 0
+                    usage_stats["completion_tokens"] += chunk.usage.completion_tokens or 0
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+        finally:
+            stream.close()
+    finally:
+        attempt.close()
+    return "".join(parts), finish_reason
+
+def is_valid_result(result_json_str: str) -> bool:
+    """Checks that a completion is a JSON object without an error key."""
+    try:
+        data = json.loads(result_json_str)
+    except (json.JSONDecodeError, TypeError):
+        return False
+    return isinstance(data, dict) and "error" not in data
+
+def get_completion_streaming(prompt: List[Dict[str, str]], model: str = "gpt-4-1106-preview", details: Dict[str, Any] = None) -> str:
+    """
+    Gets a completion through streaming responses. When hedging is enabled and
+    the call runs longer than the configured latency percentile, a duplicate
+    request is fired; the first valid JSON result wins and the other attempt
+    is cancelled.
+    """
+    # Counted once per call, however often a rate limit makes it start over.
+    latency_stats["calls"] += 1
+    return stream_with_hedging(prompt, model, details)
+
+def stream_with_hedging(prompt: List[Dict[str, str]], model: str, details: Dict[str, Any]) -> str:
+    """Runs one streaming call, hedged if enabled, starting over after a rate limit."""
+    import openai
+    start = time.monotonic()
+    latencies = latency_stats["latencies"]
+    if len(latencies) >= stream_settings["hedge_min_samples"]:
+        hedge_delay = percentile(latencies, stream_settings["hedge_percentile"])
+    else:
+        hedge_delay = stream_settings["hedge_default_delay"]
+
+    result = invalid_text = last_error = None
+    finish_reason = invalid_finish_reason = None
+    rate_limited = False
+    pending = set()
+
+    def collect(run_attempt) -> None:
+        """Records the outcome of a finished attempt."""
+        nonlocal result, finish_reason, invalid_text, invalid_finish_reason, last_error, rate_limited
+        try:
+            text, attempt_finish_reason = run_attempt()
+        except openai.RateLimitError as e:
+            rate_limited, last_error = True, e
+            return
+        except Exception as e:
+            last_error = e
+            return
+        if is_valid_result(text):
+            result, finish_reason = text, attempt_finish_reason
+        else:
+            invalid_text, invalid_finish_reason = text, attempt_finish_reason
+
+    if not stream_settings["hedge"]:
+        # Without a hedge there is nothing to cancel, so the call streams in
+        # this thread over the pooled connection.
+        collect(lambda: stream_completion(prompt, model, StreamAttempt(own_connection=False)))
+    else:
+        executor = ThreadPoolExecutor(max_workers=2)
+        attempts = []
+
+        def launch():
+            attempt = StreamAttempt()
+            attempts.append(attempt)
+            future = executor.submit(stream_completion, prompt, model, attempt)
+            pending.add(future)
+            return future
+
+        hedge = None
+        try:
+            launch()
+            while pending and result is None:
+                elapsed = time.monotonic() - start
+                remaining = stream_settings["total_timeout"] - elapsed
+                if remaining <= 0:
+                    break
+                timeout = min(remaining, max(hedge_delay - elapsed, 0)) if hedge is None else remaining
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if hedge is None and time.monotonic() - start < stream_settings["total_timeout"]:
+                        latency_stats["hedged"] += 1
+                        hedge = launch()
+                    continue
+
+                for future in done:
+                    pending.discard(future)
+                    collect(future.result)
+                    if result is not None:
+                        if future is hedge:
+                            latency_stats["hedge_wins"] += 1
+                        break
+
+                # A failed primary should not leave us waiting for the hedge
+                # delay, unless it was rate limited: then a hedge would only
+                # hit the same limit, so go straight to the back-off.
+                if result is None and not pending and hedge is None and not rate_limited:
+                    latency_stats["hedged"] += 1
+                    hedge = launch()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            # Both attempts are already running (max_workers=2), so there is
+            # nothing to cancel here; the cancelled attempts end on their own.
+            executor.shutdown(wait=False)
+
+    if result is not None:
+        latencies.append(time.monotonic() - start)
+        if details is not None:
+            details["finish_reason"] = finish_reason
+        return result
+    if rate_limited:
+        print("Rate limit exceeded. Waiting 60 seconds...")
+        time.sleep(60)
+        return stream_with_hedging(prompt, model, details)
+    if invalid_text is not None:
+        latencies.append(time.monotonic() - start)
+        if details is not None:
+            details["finish_reason"] = invalid_finish_reason
+        return invalid_text
+    if pending or last_error is None:
+        latency_stats["timeouts"] += 1
+        last_error = TimeoutError(f"No result within total timeout of {stream_settings['total_timeout']}s")
+    latency_stats["failures"] += 1
+    print(f"API call error: {last_error}")
+    return json.dumps({"error": f"API Call Failed: {str(last_error)}"})
+
+def print_latency_summary() -> None:
+    """Prints latency and hedging statistics for streamed calls."""
+    latencies = latency_stats["latencies"]
+    calls = latency_stats["calls"]
+    print("\n--- Latency Summary ---")
+    print(f"Calls: {calls}, failed: {latency_stats['failures']} (timed out: {latency_stats['timeouts']})")
+    if calls:
+        print(f"Hedged: {latency_stats['hedged']} ({100 * latency_stats['hedged'] / calls:.1f}%), won by hedge: {latency_stats['hedge_wins']}")
+    if latencies:
+        print(f"Latency p50: {percentile(latencies, 50):.2f}s, p95: {percentile(latencies, 95):.2f}s, max: {max(latencies):.2f}s")
+
 def load_requirements() -> Dict[str, str]:
     """Loads task requirements from .docx files."""
     requirements = {}
@@ -56,18 +366,16 @@ def load_requirements() -> Dict[str, str]:
             requirements[f"TASK_{task}"] = ""
     return requirements
 
-def build_prompt(task_name: str, requirement_text: str, student_submission: str, dialogue_history: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-    """Builds the detailed prompt for the LLM evaluation."""
-    system_message = """
-You are an expert evaluator assessing a student's submission based on a set of requirements. Your goal is to provide a structured, objective evaluation in JSON format. The evaluation should contain two main keys: "score" and "feedback".
-- "score": An integer from 0 to 100, where 0 is a complete failure and 100 is a perfect submission meeting all requirements.
-- "feedback": A detailed string explaining the score. It should cite specific examples from the student's submission and the conversation history to justify the rating. Explain what the student did well and what they missed or could have done better.
-
-Analyze the provided conversation history to understand the context of the student's submission. Did the student effectively use the AI's help? Did they iterate and improve? Mention this in your feedback.
-"""
-    formatted_dialogue = "\\n".join([f"Round {turn.get('round', 'N/A')}: Student: {turn.get('student', '')}\\nAI: {turn.get('gpt', '')}" for turn in dialogue_history])
+def format_dialogue(dialogue_history) -> str:
+    """Formats a dialogue history (a Student or a list of round dicts) as plain text for inclusion in a prompt."""
+    formatted_dialogue = "\\n".join([f"Round {turn.round}: Student: {turn.student}\\nAI: {turn.gpt}" for turn in as_student(dialogue_history)])
     if not formatted_dialogue:
         formatted_dialogue = "No conversation history provided."
+    return formatted_dialogue
+
+def build_prompt(task_name: str, requirement_text: str, student_submission: str, dialogue_history: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Builds the detailed prompt for the LLM evaluation."""
+    formatted_dialogue = format_dialogue(dialogue_history)
 
     user_message = f"""
 Please evaluate the following student submission.
@@ -86,53 +394,365 @@ Please evaluate the following student submission.
 ---
 Based on all the above information, please provide your evaluation in a valid JSON object with the keys "score" and "feedback".
 """
-    return [{"role": "system", "content": system_message}, {"role": "user", "content": user_message}]
+    return [{"role": "system", "content": SYSTEM_MESSAGE}, {"role": "user", "content": user_message}]
 
-def main():
-    """Main function to orchestrate the LLM evaluation process."""
-    json_file = '../final_project_data.json'
-    output_file = 'student_evaluation_llm.json'
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token for English text)."""
+    return len(text) // 4 + 1
 
-    if not os.path.exists(json_file):
-        raise FileNotFoundError(f"Data file '{json_file}' not found.")
+def estimate_prompt_tokens(prompt: List[Dict[str, str]]) -> int:
+    """Estimates the prompt tokens of a list of chat messages."""
+    return sum(estimate_tokens(message["content"]) for message in prompt)
 
-    requirements = load_requirements()
-    with open(json_file, encoding="utf-8") as f:
-        students = json.load(f)
+def format_student_block(student_id: str, student_submission: str, dialogue_history: List[Dict[str, Any]]) -> str:
+    """Formats one student's submission and dialogue for a packed prompt."""
+    return f"""
+## Student ID: {student_id}
 
-    all_eval_results = {}
+### Student's Final Submission
+{student_submission if student_submission else "The student did not provide a final answer for this task."}
+
+### Full Conversation History
+{format_dialogue(dialogue_history)}
+"""
+
+def build_packed_prompt(task_name: str, requirement_text: str, student_blocks: List[str]) -> List[Dict[str, str]]:
+    """Builds a single prompt that evaluates several students of the same task."""
+    user_message = f"""
+Please evaluate each of the following student submissions.
+
+### Task Name
+{task_name}
+
+### Task Requirements
+{requirement_text}
+
+# Students
+{"---".join(student_blocks)}
+---
+Based on all the above information, please provide your evaluations in a valid JSON object of the form {{"evaluations": [{{"student_id": "...", "score": 0, "feedback": "..."}}]}}.
+"""
+    return [{"role": "system", "content": PACKED_SYSTEM_MESSAGE}, {"role": "user", "content": user_message}]
+
+def pack_jobs(jobs: List[Dict[str, Any]], requirements: Dict[str, str], token_budget: int, max_students: int) -> List[List[Dict[str, Any]]]:
+    """
+    Groups evaluation jobs of the same task type into packs whose estimated
+    prompt size stays within token_budget. Packs also hold at most
+    max_students, and never more evaluations than fit in one completion.
+    A student that alone exceeds the budget is placed in a pack of its own.
+    """
+    max_students = max(1, min(max_students, COMPLETION_TOKEN_LIMIT // ESTIMATED_TOKENS_PER_EVALUATION))
+    overhead = estimate_tokens(PACKED_SYSTEM_MESSAGE) + 100
+    packs = []
+    by_task = {}
+    for job in jobs:
+        by_task.setdefault(job["task_type"], []).append(job)
+
+    for task_type, task_jobs in sorted(by_task.items()):
+        base_tokens = overhead + estimate_tokens(requirements.get(f"TASK_{task_type}", ""))
+        current, current_tokens = [], base_tokens
+        for job in task_jobs:
+            # The block is only formatted to size it; it is rebuilt when the pack is sent.
+            job_tokens = estimate_tokens(format_student_block(job["student_id"], job["submission"], job["dialogue_history"]))
+            if current and (current_tokens + job_tokens > token_budget or len(current) >= max_students):
+                packs.append(current)
+                current, current_tokens = [], base_tokens
+            current.append(job)
+            current_tokens += job_tokens
+        if current:
+            packs.append(current)
+    return packs
+
+def split_packed_response(result_json_str: str, expected_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Splits a packed LLM response into per-student evaluations.
+    Returns the valid evaluations keyed by student ID and the list of IDs
+    that were missing or malformed and need to be re-run individually.
+    """
+    try:
+        data = json.loads(result_json_str)
+    except (json.JSONDecodeError, TypeError):
+        return {}, list(expected_ids)
+
+    entries = data.get("evaluations") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}, list(expected_ids)
+
+    expected = set(expected_ids)
+    evaluations = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        student_id = str(entry.get("student_id", "")).strip()
+        score = entry.get("score")
+        feedback = entry.get("feedback")
+        if student_id not in expected or student_id in evaluations:
+            continue
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            continue
+        if not isinstance(feedback, str) or not feedback.strip():
+            continue
+        evaluations[student_id] = {"score": score, "feedback": feedback}
+
+    missing = [student_id for student_id in expected_ids if student_id not in evaluations]
+    return evaluations, missing
+
+def evaluate_single(job: Dict[str, Any], requirement_text: str) -> Dict[str, Any]:
+    """Evaluates one student with its own request."""
+    prompt_messages = build_prompt(f"Task {job['task_type']}", requirement_text, job["submission"], job["dialogue_history"])
+    result_json_str = get_completion(prompt_messages)
+    try:
+        return json.loads(result_json_str)
+    except json.JSONDecodeError:
+        return {"error": "Invalid JSON from LLM", "raw": result_json_str}
+
+def build_jobs(students, requirements: Dict[str, str], all_eval_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Turns student records into evaluation jobs. Students without requirements
+    for their task get an error entry in all_eval_results instead.
+    """
+    jobs = []
     for student in students:
-        student_id = student.get("student_id")
-        task_type = student.get("task_type")
-        submission = student.get("final_submission")
-        dialogue_history = student.get("dialogue_history", [])
+        student = as_student(student)
+        student_id = student.student_id
+        task_type = student.task_type
+        submission = student.final_submission
+        dialogue_history = student
 
         if not all([student_id, task_type, submission]):
             continue
 
-        print(f"--- Evaluating Student ID: {student_id} (Task {task_type}) ---")
         requirement_key = f"TASK_{task_type}"
-        requirement_text = requirements.get(requirement_key)
-
-        if not requirement_text:
+        if not requirements.get(requirement_key):
             all_eval_results[student_id] = {"error": f"Requirements for {requirement_key} not found."}
             continue
-        
-        prompt_messages = build_prompt(f"Task {task_type}", requirement_text, submission, dialogue_history)
-        result_json_str = get_completion(prompt_messages)
 
+        jobs.append({
+            "student_id": str(student_id),
+            "task_type": task_type,
+            "submission": submission,
+            "dialogue_history": dialogue_history,
+        })
+    return jobs
+
+def run_queue_worker(queue_path: str, jobs: List[Dict[str, Any]], requirements: Dict[str, str], lease_seconds: float) -> None:
+    """
+    Evaluates students leased from a shared work queue until none are left.
+    Several workers, on one or more machines, can run against the same queue;
+    results are only written to the output file by the merge step.
+    """
+    from work_queue import WorkQueue
+
+    queue = WorkQueue(queue_path)
+    added = queue.add_jobs((job["student_id"], job["task_type"]) for job in jobs)
+    if added:
+        print(f"Added {added} students to the work queue '{queue_path}'.")
+    jobs_by_id = {job["student_id"]: job for job in jobs}
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    evaluated = reclaimed = 0
+    start = time.monotonic()
+
+    while True:
+        leased = queue.lease(worker, lease_seconds)
+        if leased is None:
+            progress = queue.progress()
+            if progress["pending"] == 0 and progress["leased"] == 0:
+                break
+            # Other workers still hold leases; wait in case one of them expires.
+            time.sleep(min(lease_seconds / 4, 5))
+            continue
+
+        student_id, was_reclaimed = leased
+        reclaimed += was_reclaimed
+        job = jobs_by_id.get(student_id)
+        if job is None:
+            queue.complete(worker, student_id, {"error": "Student not found in this worker's input file."})
+            continue
+
+        print(f"--- [{worker}] Evaluating Student ID: {student_id} (Task {job['task_type']}){' (reclaimed)' if was_reclaimed else ''} ---")
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            heartbeat_queue = WorkQueue(queue_path)
+            try:
+                while not stop_heartbeat.wait(lease_seconds / 3):
+                    if not heartbeat_queue.heartbeat(worker, student_id, lease_seconds):
+                        print(f"  - [{worker}] Lost lease on Student ID: {student_id}.")
+                        break
+            finally:
+                heartbeat_queue.close()
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
         try:
-            evaluation = json.loads(result_json_str)
-        except json.JSONDecodeError:
-            evaluation = {"error": "Invalid JSON from LLM", "raw": result_json_str}
-        
-        all_eval_results[student_id] = {"task_type": task_type, "evaluation": evaluation}
-        print(f"--- Finished Student ID: {student_id}. Waiting 1 second. ---")
+            evaluation = evaluate_single(job, requirements[f"TASK_{job['task_type']}"])
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+        queue.complete(worker, student_id, {"task_type": job["task_type"], "evaluation": evaluation})
+        evaluated += 1
         time.sleep(1)
 
+    elapsed = time.monotonic() - start
+    queue.close()
+    print(f"\n[{worker}] Evaluated {evaluated} students ({reclaimed} reclaimed from expired leases) in {elapsed:.1f}s.")
+
+def merge_queue_results(queue_path: str, jobs: List[Dict[str, Any]], all_eval_results: Dict[str, Any]) -> None:
+    """Fills all_eval_results from a work queue, in input order."""
+    from work_queue import WorkQueue
+
+    queue = WorkQueue(queue_path)
+    results = queue.results()
+    progress = queue.progress()
+    queue.close()
+    missing = [job["student_id"] for job in jobs if job["student_id"] not in results]
+    for job in jobs:
+        if job["student_id"] in results:
+            all_eval_results[job["student_id"]] = results[job["student_id"]]
+    if missing:
+        print(f"Warning: {len(missing)} students have no result yet ({progress['pending']} pending, {progress['leased']} leased): {', '.join(missing)}")
+
+def main():
+    """Main function to orchestrate the LLM evaluation process."""
+    parser = argparse.ArgumentParser(description="Evaluate student submissions with an LLM.")
+    parser.add_argument("--pack", action="store_true",
+                        help="Evaluate several students of the same task in a single request.")
+    parser.add_argument("--pack-token-budget", type=int, default=8000,
+                        help="Approximate prompt token budget per packed request (default: 8000).")
+    parser.add_argument("--pack-max-students", type=int, default=8,
+                        help=f"Maximum students per packed request, so the evaluations fit in one completion "
+                             f"(default: 8, never more than {COMPLETION_TOKEN_LIMIT // ESTIMATED_TOKENS_PER_EVALUATION}).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Use streaming responses with first-token and total timeouts.")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Fire a duplicate request when a call exceeds the hedge latency percentile (implies --stream).")
+    parser.add_argument("--first-token-timeout", type=float, default=30.0,
+                        help="Seconds to wait for the first (and each following) streamed chunk (default: 30).")
+    parser.add_argument("--total-timeout", type=float, default=120.0,
+                        help="Seconds allowed for a whole completion, including hedges (default: 120).")
+    parser.add_argument("--hedge-percentile", type=float, default=95.0,
+                        help="Latency percentile after which a hedged request is fired (default: 95).")
+    parser.add_argument("--input", default='../final_project_data.json',
+                        help="Input data file (default: ../final_project_data.json).")
+    parser.add_argument("--output", default='student_evaluation_llm.json',
+                        help="Output file (default: student_evaluation_llm.json).")
+    parser.add_argument("--queue",
+                        help="Shared SQLite work queue file. Run several workers against it, then merge.")
+    parser.add_argument("--queue-mode", choices=["work", "merge"], default="work",
+                        help="With --queue: 'work' evaluates leased students, 'merge' writes the output file (default: work).")
+    parser.add_argument("--lease-seconds", type=float, default=300.0,
+                        help="With --queue: seconds before an unrenewed lease expires and is reclaimed (default: 300).")
+    args = parser.parse_args()
+
+    stream_settings["enabled"] = args.stream or args.hedge
+    stream_settings["hedge"] = args.hedge
+    stream_settings["first_token_timeout"] = args.first_token_timeout
+    stream_settings["total_timeout"] = args.total_timeout
+    stream_settings["hedge_percentile"] = args.hedge_percentile
+
+    json_file = args.input
+    output_file = args.output
+
+    if not os.path.exists(json_file):
+        raise FileNotFoundError(f"Data file '{json_file}' not found.")
+
+    requirements = load_requirements()
+    students = load_corpus(json_file)
+
+    all_eval_results = {}
+    jobs = build_jobs(students, requirements, all_eval_results)
+
+    if args.queue and args.queue_mode == "work":
+        run_queue_worker(args.queue, jobs, requirements, args.lease_seconds)
+        if stream_settings["enabled"]:
+            print_latency_summary()
+        return
+    elif args.queue:
+        merge_queue_results(args.queue, jobs, all_eval_results)
+    elif args.pack:
+        evaluate_packed(jobs, requirements, args.pack_token_budget, args.pack_max_students, all_eval_results)
+    else:
+        for job in jobs:
+            student_id, task_type = job["student_id"], job["task_type"]
+            print(f"--- Evaluating Student ID: {student_id} (Task {task_type}) ---")
+            evaluation = evaluate_single(job, requirements[f"TASK_{task_type}"])
+            all_eval_results[student_id] = {"task_type": task_type, "evaluation": evaluation}
+            print(f"--- Finished Student ID: {student_id}. Waiting 1 second. ---")
+            time.sleep(1)
+
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(all_eval_results, f, indent=4, ensure_ascii=False)
+    if stream_settings["enabled"]:
+        print_latency_summary()
     print(f"\\nEvaluation complete. Results saved to '{output_file}'.")
 
+def evaluate_packed(jobs: List[Dict[str, Any]], requirements: Dict[str, str], token_budget: int, max_students: int, all_eval_results: Dict[str, Any]) -> None:
+    """
+    Evaluates jobs in packed requests, re-running any missing or malformed
+    entries individually, and reports the token and request savings.
+    Results are added to all_eval_results in the order of jobs.
+    """
+    unpacked_tokens = sum(
+        estimate_prompt_tokens(build_prompt(f"Task {job['task_type']}", requirements[f"TASK_{job['task_type']}"], job["submission"], job["dialogue_history"]))
+        for job in jobs
+    )
+    packed_tokens = 0
+    fallback_count = single_count = 0
+    truncated_packs = truncated_students = 0
+    results = {}
+
+    for pack in pack_jobs(jobs, requirements, token_budget, max_students):
+        task_type = pack[0]["task_type"]
+        requirement_text = requirements[f"TASK_{task_type}"]
+        pack_ids = [job["student_id"] for job in pack]
+        if len(pack) == 1:
+            # A student that fills a pack alone gains nothing from the packed format.
+            job = pack[0]
+            print(f"--- Evaluating Student ID: {job['student_id']} (Task {task_type}) in its own request ---")
+            single_count += 1
+            packed_tokens += estimate_prompt_tokens(build_prompt(f"Task {task_type}", requirement_text, job["submission"], job["dialogue_history"]))
+            results[job["student_id"]] = {"task_type": task_type, "evaluation": evaluate_single(job, requirement_text)}
+            time.sleep(1)
+            continue
+        print(f"--- Evaluating {len(pack)} students in one request (Task {task_type}): {', '.join(pack_ids)} ---")
+
+        blocks = [format_student_block(job["student_id"], job["submission"], job["dialogue_history"]) for job in pack]
+        prompt_messages = build_packed_prompt(f"Task {task_type}", requirement_text, blocks)
+        packed_tokens += estimate_prompt_tokens(prompt_messages)
+        details = {}
+        evaluations, missing = split_packed_response(get_completion(prompt_messages, details=details), pack_ids)
+        truncated = details.get("finish_reason") == "length"
+        if truncated:
+            truncated_packs += 1
+            truncated_students += len(missing)
+            print(f"  - Response was truncated at the completion limit; {len(missing)} students were cut off.")
+
+        for job in pack:
+            student_id = job["student_id"]
+            if student_id in evaluations:
+                results[student_id] = {"task_type": task_type, "evaluation": evaluations[student_id]}
+                continue
+            reason = "Cut off by truncation" if truncated else "Missing or malformed result"
+            print(f"  - {reason} for Student ID: {student_id}. Re-running individually.")
+            fallback_count += 1
+            packed_tokens += estimate_prompt_tokens(build_prompt(f"Task {task_type}", requirement_text, job["submission"], job["dialogue_history"]))
+            results[student_id] = {"task_type": task_type, "evaluation": evaluate_single(job, requirement_text)}
+        time.sleep(1)
+
+    # Packs are grouped by task; write the results in input order like the serial path.
+    for job in jobs:
+        all_eval_results[job["student_id"]] = results[job["student_id"]]
+
+    print("\n--- Packing Summary ---")
+    print(f"Students evaluated: {len(jobs)} (sent alone: {single_count}, re-run individually: {fallback_count})")
+    if truncated_packs:
+        print(f"Truncated packs: {truncated_packs} ({truncated_students} students re-run because of truncation); consider a lower --pack-max-students")
+    print(f"Requests: {usage_stats['requests']} (unpacked: {len(jobs)})")
+    if unpacked_tokens:
+        reduction = 100 * (1 - packed_tokens / unpacked_tokens)
+        print(f"Estimated prompt tokens: {packed_tokens} (unpacked: {unpacked_tokens}, {reduction:.1f}% reduction)")
+    if usage_stats["prompt_tokens"]:
+        print(f"Actual tokens reported by API: {usage_stats['prompt_tokens']} prompt, {usage_stats['completion_tokens']} completion")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,6 +1,5 @@
 import os
 import json
-from docx import Document
 import re
 import sys
 
@@ -14,8 +13,12 @@ def extract_student_id(filename):
     match = re.search(r'ID(\d+)', filename)
     return match.group(1) if match else None
 
-def get_answer_from_doc(file_path):
-    """Extracts the final answer from the last paragraph of a .docx file."""
+def get_answer_from_doc(file_path, strict=False):
+    """
+    Extracts the final answer from the last paragraph of a .docx file.
+    With strict=True, a file that cannot be read raises instead of giving "".
+    """
+    from docx import Document
     try:
         doc = Document(file_path)
         # It's safer to find the last non-empty paragraph
@@ -26,6 +29,8 @@ def get_answer_from_doc(file_path):
                 break
         return text
     except Exception as e:
+        if strict:
+            raise
         print(f"  -> Could not process answer file {os.path.basename(file_path)}: {e}")
         return ""
 
@@ -0,0 +1,142 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Counters shared by all handler threads.
+stats = {"requests": 0, "slow": 0, "completed": 0, "disconnected": 0}
+stats_lock = threading.Lock()
+
+def count(key):
+    with stats_lock:
+        stats[key] += 1
+
+def build_content(messages):
+    """Builds a plausible evaluation JSON string for the given chat messages."""
+    system_text = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    user_text = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+    if '"evaluations"' in system_text:
+        student_ids = re.findall(r'## Student ID: (\S+)', user_text)
+        evaluations = [
+            {"student_id": student_id, "score": random.randint(40, 100), "feedback": f"Mock feedback for student {student_id}."}
+            for student_id in student_ids
+        ]
+        return json.dumps({"evaluations": evaluations})
+    return json.dumps({"score": random.randint(40, 100), "feedback": "Mock feedback generated by the local test server."})
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Answers OpenAI-style chat completion requests after a random delay."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        count("requests")
+
+        config = self.server.config
+        if random.random() < config.slow_rate:
+            count("slow")
+            delay = random.uniform(config.slow_min, config.slow_max)
+        else:
+            delay = random.uniform(config.fast_min, config.fast_max)
+        time.sleep(delay)
+
+        content = build_content(body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+        try:
+            if body.get("stream"):
+                include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+                self.stream_response(completion_id, model, content, include_usage)
+            else:
+                self.json_response(completion_id, model, content)
+            count("completed")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled this request (e.g. a hedge won the race).
+            count("disconnected")
+
+    def json_response(self, completion_id, model, content):
+        payload = json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stream_response(self, completion_id, model, content, include_usage=False):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send_chunk(delta, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+            }
+            if usage is not None:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send_chunk({"role": "assistant", "content": ""})
+        for i in range(0, len(content), 16):
+            send_chunk({"content": content[i:i + 16]})
+            time.sleep(self.server.config.chunk_delay)
+        send_chunk({}, "stop")
+        if include_usage:
+            # Like the real API, usage arrives in a final chunk without choices.
+            send_chunk(None, usage={"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+def main():
+    """
+    Runs a local OpenAI-compatible server that injects random delays, so the
+    streaming and hedging options of evaluate_results_llm.py can be tried
+    without calling the real API.
+    """
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completion server with random delays.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="Fraction of requests that are slow (default: 0.1).")
+    parser.add_argument("--fast-min", type=float, default=0.2)
+    parser.add_argument("--fast-max", type=float, default=0.8)
+    parser.add_argument("--slow-min", type=float, default=5.0)
+    parser.add_argument("--slow-max", type=float, default=15.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Delay between streamed chunks in seconds.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), MockHandler)
+    server.daemon_threads = True
+    server.config = args
+    print(f"Mock LLM server listening on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {stats['requests']} requests ({stats['slow']} slow), "
+              f"{stats['completed']} completed, {stats['disconnected']} cancelled by the client.")
+
+if __name__ == "__main__":
+    main()
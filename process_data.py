@@ -1,6 +1,5 @@
 import os
 import json
-from docx import Document
 import re
 from typing import Optional
 
@@ -23,6 +22,7 @@ def parse_conversation_file(doc_path):
     The definitive parser. This handles multiple classes of formatting errors
     by pre-processing the text and then using a robust state machine.
     """
+    from docx import Document
     try:
         doc = Document(doc_path)
         all_paras = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
@@ -30,7 +30,13 @@ def parse_conversation_file(doc_path):
         # This can happen if the docx file is corrupted
         print(f"ERROR: Could not read {os.path.basename(doc_path)}. Error: {e}")
         return []
+    return parse_conversation_paragraphs(all_paras)
 
+def parse_conversation_paragraphs(all_paras):
+    """
+    Runs the parser on the non-empty, stripped paragraphs of a conversation
+    file, so callers that already read the document can reuse them.
+    """
     # 1. Pre-filter junk lines copied from web interfaces
     paras = [p for p in all_paras if p.lower() not in ('top of form', 'bottom of form', 'sources')]
 
@@ -106,6 +112,7 @@ def parse_conversation_file(doc_path):
     return final_history
 
 def process_answer_file(file_path):
+    from docx import Document
     doc = Document(file_path)
     # Assuming the final answer is in the last paragraph
     final_submission = doc.paragraphs[-1].text.strip() if doc.paragraphs else ""
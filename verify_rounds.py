@@ -1,84 +1,215 @@
-import pandas as pd
-import json
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from dialogue_model import GPT, STUDENT, as_student, load_corpus
+
+# Exit codes, so the verification can gate automated pipelines.
+EXIT_OK = 0
+EXIT_MISMATCH = 1
+EXIT_ERROR = 2
+
+def load_ground_truth(excel_path):
+    """Returns a DataFrame of student_id and expected round count from 'Raw Data.xlsx'."""
+    import pandas as pd
+
+    df = pd.read_excel(excel_path, engine='openpyxl')
+    id_col_name = next((col for col in df.columns if str(col).lower() in ['id', 'student id', 'studentid']), None)
+    prompt_col_name = "# of prompts"
+    if id_col_name is None or prompt_col_name not in df.columns:
+        raise ValueError(f"'Raw Data.xlsx' needs an ID column and a '{prompt_col_name}' column.")
+    df = df[[id_col_name, prompt_col_name]].dropna()
+    return pd.DataFrame({
+        "student_id": df[id_col_name].astype(int).astype(str),
+        "expected": df[prompt_col_name].astype(int),
+    }).drop_duplicates("student_id", keep="last")
+
+def count_frame(counts, column):
+    """Turns {student_id: round_count} into a two-column DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame({"student_id": list(counts.keys()), column: list(counts.values())}, columns=["student_id", column])
+
+def compare_counts(ground_truth, generated, actual_columns):
+    """
+    Joins the ground truth against one or more generated round-count columns
+    with a single outer merge and marks mismatches without a Python loop.
+    Students without ground truth are never counted as mismatches.
+    """
+    import pandas as pd
+
+    merged = ground_truth.merge(generated, on="student_id", how="outer")
+    has_truth = merged["expected"].notna()
+    mismatch = pd.Series(False, index=merged.index)
+    for column in actual_columns:
+        mismatch |= has_truth & (merged[column].isna() | (merged[column] != merged["expected"]))
+    merged["mismatch"] = mismatch
+    merged["status"] = "✅ OK"
+    merged.loc[~has_truth, "status"] = "✅ OK (No ground truth)"
+    merged.loc[mismatch, "status"] = "❌ MISMATCH"
+    merged["_order"] = pd.to_numeric(merged["student_id"], errors="coerce")
+    return merged.sort_values(["_order", "student_id"]).drop(columns="_order").reset_index(drop=True)
+
+def normalize_text(text):
+    """Ignores whitespace differences, including the literal '\\n' separators process_data.py writes."""
+    return " ".join(text.replace("\\n", "\n").split())
+
+def parse_with_both(doc_path):
+    """
+    Runs both parsers on one file. Executed in worker processes; the document
+    is read once and its paragraphs are handed to each parser.
+    """
+    from docx import Document
+    from debug_parser import parse_dialogue_paragraphs
+    from process_data import extract_student_id, parse_conversation_paragraphs
+
+    student_id = extract_student_id(os.path.basename(doc_path))
+    try:
+        paragraphs = [p.text.strip() for p in Document(doc_path).paragraphs if p.text.strip()]
+    except Exception as e:
+        print(f"ERROR: Could not read {os.path.basename(doc_path)}. Error: {e}", file=sys.stderr)
+        return student_id, [], []
+    return student_id, parse_conversation_paragraphs(paragraphs), parse_dialogue_paragraphs(paragraphs)
+
+def diff_dialogues(main_history, debug_history):
+    """Returns a short description of the first content difference between two parses, or ''."""
+    main, debug = as_student(main_history), as_student(debug_history)
+    for main_round, debug_round in zip(main, debug):
+        for role in (STUDENT, GPT):
+            main_text = normalize_text(main_round.student if role == STUDENT else main_round.gpt)
+            debug_text = normalize_text(debug_round.student if role == STUDENT else debug_round.gpt)
+            if main_text != debug_text:
+                return f"round {main_round.round} {role} text differs"
+    if len(main) != len(debug):
+        return f"{abs(len(main) - len(debug))} extra rounds in {'process_data' if len(main) > len(debug) else 'debug_parser'}"
+    return ""
+
+def reparse_corpus(conversations_dir, workers):
+    """
+    Re-parses every conversation file with both parsers in parallel.
+    Returns round counts per parser and the per-student content differences.
+    """
+    paths = sorted(
+        os.path.join(conversations_dir, f) for f in os.listdir(conversations_dir)
+        if f.endswith('.docx') and not f.startswith('._') and not f.startswith('~$')
+    )
+    main_counts, debug_counts, content_diffs = {}, {}, {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for student_id, main_history, debug_history in executor.map(parse_with_both, paths, chunksize=8):
+            if not student_id:
+                continue
+            main_counts[student_id] = len(main_history)
+            debug_counts[student_id] = len(debug_history)
+            difference = diff_dialogues(main_history, debug_history)
+            if difference:
+                content_diffs[student_id] = difference
+    return main_counts, debug_counts, content_diffs
+
+def print_table(merged, columns, only_mismatches):
+    headers = {"json": "Actual Rounds", "process_data": "process_data", "debug_parser": "debug_parser"}
+    print(f"{'Student ID':<12} | {'Expected Rounds':<18} | " + " | ".join(f"{headers[c]:<16}" for c in columns) + " | Status")
+    print("-" * (52 + 19 * len(columns)))
+    rows = merged[merged["mismatch"]] if only_mismatches else merged
+    for row in rows.itertuples(index=False):
+        row = row._asdict()
+        cells = []
+        for value in [row["expected"]] + [row[c] for c in columns]:
+            cells.append("N/A" if value != value or value is None else str(int(value)))
+        print(f"{row['student_id']:<12} | {cells[0]:<18} | " + " | ".join(f"{c:<16}" for c in cells[1:]) + f" | {row['status']}")
 
 def verify_prompt_counts():
     """
     Verifies that the number of conversation rounds in the generated JSON file
-    matches the ground truth count from 'Raw Data.xlsx'.
+    matches the ground truth count from 'Raw Data.xlsx'. With --reparse, the
+    corpus is also re-parsed with both parsers (process_data.py and
+    debug_parser.py) and their round counts and contents are compared.
+    Exits with 0 if everything matches, 1 on mismatches and 2 on errors.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.dirname(script_dir)
 
-    # We now verify the new file created by our build script
-    json_path = os.path.join(base_dir, "final_project_data.json")
-    excel_path = os.path.join(base_dir, "Raw Data.xlsx")
+    parser = argparse.ArgumentParser(description="Verify round counts against 'Raw Data.xlsx' and diff the parsers.")
+    parser.add_argument("--data", default=os.path.join(base_dir, "final_project_data.json"),
+                        help="Generated data file to verify (default: ../final_project_data.json).")
+    parser.add_argument("--ground-truth", default=os.path.join(base_dir, "Raw Data.xlsx"),
+                        help="Ground truth spreadsheet (default: ../Raw Data.xlsx).")
+    parser.add_argument("--reparse", action="store_true",
+                        help="Re-parse the conversation files with both parsers and report their differences.")
+    parser.add_argument("--conversations", default=os.path.join(base_dir, "Conversations - Cleaned"),
+                        help="Conversation folder used by --reparse.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --reparse (default: CPU count).")
+    parser.add_argument("--only-mismatches", action="store_true", help="Only print rows that do not match.")
+    parser.add_argument("--report", help="Also write the comparison table to this CSV file.")
+    args = parser.parse_args()
 
-    if not os.path.exists(json_path):
-        print(f"ERROR: The data file 'final_project_data.json' was not found.", file=sys.stderr)
-        sys.exit(1)
-    if not os.path.exists(excel_path):
-        print(f"ERROR: Ground truth file 'Raw Data.xlsx' not found.", file=sys.stderr)
-        sys.exit(1)
+    # The data file is optional when re-parsing, since the parsers are compared directly.
+    if not args.reparse and not os.path.exists(args.data):
+        print(f"ERROR: The data file '{os.path.basename(args.data)}' was not found.", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    if not os.path.exists(args.ground_truth):
+        print(f"ERROR: Ground truth file '{os.path.basename(args.ground_truth)}' not found.", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    if args.reparse and not os.path.isdir(args.conversations):
+        print(f"ERROR: Conversation folder '{args.conversations}' not found.", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
 
     print("--- Starting Verification ---")
-    print(f"Loading generated data from: {os.path.basename(json_path)}")
-    print(f"Loading ground truth from: {os.path.basename(excel_path)}\\n")
+    print(f"Loading ground truth from: {os.path.basename(args.ground_truth)}")
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            generated_data = json.load(f)
-        
-        generated_counts = {
-            str(student['student_id']): len(student['dialogue_history'])
-            for student in generated_data
-        }
-
-        df = pd.read_excel(excel_path, engine='openpyxl')
-        id_col_name = next((col for col in df.columns if col.lower() in ['id', 'student id', 'studentid']), None)
-        prompt_col_name = "# of prompts"
-        df.dropna(subset=[id_col_name, prompt_col_name], inplace=True)
-        ground_truth_counts = df.set_index(id_col_name)[prompt_col_name].to_dict()
-        ground_truth_counts = {str(int(k)): int(v) for k, v in ground_truth_counts.items()}
-        
-        mismatched_students = []
-        all_students = sorted(list(set(ground_truth_counts.keys()) | set(generated_counts.keys())), key=int)
-        
-        print(f"{'Student ID':<12} | {'Expected Rounds':<18} | {'Actual Rounds':<16} | {'Status'}")
-        print("-" * 68)
-
-        for student_id in all_students:
-            expected = ground_truth_counts.get(student_id)
-            actual = generated_counts.get(student_id)
-            
-            # Per your instruction, we ignore cases where the Excel file has no data (N/A)
-            if expected is None:
-                status = "✅ OK (No ground truth)"
-            elif actual is None:
-                 status = "❌ MISMATCH"
-                 mismatched_students.append(student_id)
-            elif expected == actual:
-                status = "✅ OK"
-            else:
-                status = "❌ MISMATCH"
-                mismatched_students.append(student_id)
-
-            expected_str = str(expected) if expected is not None else "N/A"
-            actual_str = str(actual) if actual is not None else "N/A"
-            print(f"{student_id:<12} | {expected_str:<18} | {actual_str:<16} | {status}")
-
-        print("\\n--- Verification Summary ---")
+        ground_truth = load_ground_truth(args.ground_truth)
+        generated = ground_truth[["student_id"]].iloc[0:0]
+        columns = []
+
+        if os.path.exists(args.data):
+            print(f"Loading generated data from: {os.path.basename(args.data)}")
+            generated = count_frame({s.student_id: len(s) for s in load_corpus(args.data)}, "json")
+            columns.append("json")
+
+        content_diffs = {}
+        if args.reparse:
+            print(f"Re-parsing '{os.path.basename(args.conversations)}' with both parsers...")
+            main_counts, debug_counts, content_diffs = reparse_corpus(args.conversations, args.workers)
+            parsed = count_frame(main_counts, "process_data").merge(
+                count_frame(debug_counts, "debug_parser"), on="student_id", how="outer")
+            generated = generated.merge(parsed, on="student_id", how="outer") if columns else parsed
+            columns += ["process_data", "debug_parser"]
+        print()
+
+        merged = compare_counts(ground_truth, generated, columns)
+        if args.reparse:
+            # Parser disagreements count as mismatches even without ground truth.
+            disagree = merged["process_data"].fillna(-1) != merged["debug_parser"].fillna(-1)
+            disagree |= merged["student_id"].isin(list(content_diffs))
+            merged.loc[disagree & ~merged["mismatch"], "status"] = "❌ PARSERS DIFFER"
+            merged["mismatch"] |= disagree
+            merged["content_diff"] = merged["student_id"].map(content_diffs).fillna("")
+
+        print_table(merged, columns, args.only_mismatches)
+
+        if args.report:
+            merged.to_csv(args.report, index=False, encoding='utf-8')
+            print(f"\nComparison written to '{args.report}'.")
+
+        mismatched_students = merged.loc[merged["mismatch"], "student_id"].tolist()
+        print("\n--- Verification Summary ---")
+        if content_diffs:
+            print("Parser content differences:")
+            for student_id in sorted(content_diffs, key=lambda x: (len(x), x)):
+                print(f"  - ID {student_id}: {content_diffs[student_id]}")
         if not mismatched_students:
             print("✅ Success! All student round counts match the ground truth.")
         else:
             print(f"❌ Failure! Found mismatches for {len(mismatched_students)} students.")
-            print("Mismatched IDs:", ", ".join(sorted(mismatched_students, key=int)))
-        print("----------------------------\\n")
+            print("Mismatched IDs:", ", ".join(mismatched_students))
+        print("----------------------------\n")
 
     except Exception as e:
-        print(f"\\nAn unexpected error occurred: {e}", file=sys.stderr)
-        sys.exit(1)
+        print(f"\nAn unexpected error occurred: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    sys.exit(EXIT_MISMATCH if mismatched_students else EXIT_OK)
 
 if __name__ == "__main__":
-    verify_prompt_counts() 
\ No newline at end of file
+    verify_prompt_counts()
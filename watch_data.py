@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from merge_answers import get_answer_from_doc
+from process_data import extract_student_id, extract_task_type, parse_conversation_paragraphs
+
+EVAL_JSON_PATH = "student_evaluation_llm.json"
+SIM_JSON_PATH = "student_similarity_scores.json"
+
+def scan_directory(directory: str) -> Dict[str, Tuple[int, int]]:
+    """Returns {filename: (mtime_ns, size)} for the .docx files in a directory."""
+    snapshot = {}
+    if not os.path.isdir(directory):
+        return snapshot
+    for entry in os.scandir(directory):
+        name = entry.name
+        if name.endswith('.docx') and not name.startswith('._') and not name.startswith('~$'):
+            stat = entry.stat()
+            snapshot[name] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+def changed_files(old: Dict[str, Tuple[int, int]], new: Dict[str, Tuple[int, int]]) -> Set[str]:
+    """Returns the names of files that were added, changed or removed between two snapshots."""
+    return {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+
+def find_file(snapshot: Dict[str, Tuple[int, int]], student_id: str) -> Optional[str]:
+    """Finds the file belonging to a student ID in a snapshot."""
+    for name in sorted(snapshot):
+        if extract_student_id(name) == student_id:
+            return name
+    return None
+
+def load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_json(path: str, data, indent: int = 4) -> None:
+    """Writes JSON through a temporary file so readers never see a half-written file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def read_conversation(doc_path: str) -> List[dict]:
+    """
+    Parses a conversation file like process_data.parse_conversation_file, but
+    lets read errors propagate instead of returning an empty dialogue, so a
+    half-copied file never replaces a good record.
+    """
+    from docx import Document
+
+    paragraphs = [p.text.strip() for p in Document(doc_path).paragraphs if p.text.strip()]
+    return parse_conversation_paragraphs(paragraphs)
+
+def rebuild_student(student_id: str, answers_dir: str, answers: Dict[str, Tuple[int, int]],
+                    conversations_dir: str, conversations: Dict[str, Tuple[int, int]]) -> Optional[dict]:
+    """
+    Re-parses one student's files the same way the pipeline does: the
+    dialogue as in process_data.py and the answer as in merge_answers.py
+    (last non-empty paragraph). Returns None if the student no longer has an
+    answer file. Raises if one of the files cannot be read.
+    """
+    answer_name = find_file(answers, student_id)
+    if answer_name is None or extract_task_type(answer_name) is None:
+        return None
+    conversation_name = find_file(conversations, student_id)
+    dialogue_history = []
+    if conversation_name:
+        dialogue_history = read_conversation(os.path.join(conversations_dir, conversation_name))
+    return {
+        "student_id": student_id,
+        "dialogue_history": dialogue_history,
+        "final_submission": get_answer_from_doc(os.path.join(answers_dir, answer_name), strict=True),
+        "task_type": extract_task_type(answer_name)
+    }
+
+class IncrementalUpdater:
+    """
+    Patches the data file and the evaluation and similarity outputs for a set
+    of changed students. The LLM client and the sentence transformer model are
+    only created the first time they are needed.
+    """
+
+    def __init__(self, data_path: str, evaluate: bool = True, similarity: bool = True, convert: bool = True):
+        self.data_path = data_path
+        self.evaluate = evaluate
+        self.similarity = similarity
+        self.convert = convert
+        self._requirements = None
+        self._model = None
+        # Evaluations of students whose similarity failed, keyed by student ID as
+        # (record, evaluation), so a retry of the same record does not pay for
+        # another LLM call.
+        self._held_evaluations = {}
+
+    def requirements(self) -> Dict[str, str]:
+        if self._requirements is None:
+            from evaluate_results_llm import load_requirements
+            self._requirements = load_requirements()
+        return self._requirements
+
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            print("Loading sentence transformer model...")
+            self._model = SentenceTransformer('all-MiniLM-L6-v2')
+        return self._model
+
+    def apply(self, updated: Dict[str, Optional[dict]]) -> Set[str]:
+        """
+        Applies re-parsed records (None meaning removed) to all outputs. Only
+        records that actually differ from the data file are re-evaluated, and
+        only changed dialogues are re-embedded. A student whose evaluation or
+        similarity fails is left untouched in every file; the IDs of those
+        students are returned so they can be retried.
+        """
+        students = load_json(self.data_path, [])
+        by_id = {str(s.get("student_id")): s for s in students}
+
+        removed, changed_ids, embed_ids = [], [], set()
+        for student_id, record in sorted(updated.items(), key=lambda item: int(item[0])):
+            old = by_id.get(student_id)
+            if record is None:
+                if old is not None:
+                    del by_id[student_id]
+                    removed.append(student_id)
+                continue
+            if old == record:
+                continue
+            changed_ids.append(student_id)
+            if old is None or old.get("dialogue_history") != record["dialogue_history"] or old.get("task_type") != record["task_type"]:
+                embed_ids.add(student_id)
+
+        # Run the expensive stages first, so a failure leaves that student's record as it was.
+        evaluations, scores, failed = {}, {}, set()
+        for student_id in changed_ids:
+            record = updated[student_id]
+            held = self._held_evaluations.pop(student_id, None)
+            try:
+                if not self.evaluate:
+                    evaluation = None
+                elif held is not None and held[0] == record:
+                    print(f"--- Reusing the new evaluation of Student ID: {student_id} ---")
+                    evaluation = held[1]
+                else:
+                    evaluation = self.evaluate_student(record)
+                    held = (record, evaluation)
+                score = self.score_student(record) if self.similarity and student_id in embed_ids else None
+            except (Exception, SystemExit) as e:
+                print(f"  - Could not update Student ID {student_id}: {e!r}. Leaving it unchanged; retrying on the next scan.")
+                failed.add(student_id)
+                if held is not None and held[0] == record:
+                    self._held_evaluations[student_id] = held
+                continue
+            # Only a student for whom every stage succeeded is written anywhere.
+            if self.evaluate:
+                evaluations[student_id] = evaluation
+            if score is not None:
+                scores[student_id] = score
+            by_id[student_id] = record
+        updated_ids = [i for i in changed_ids if i not in failed]
+
+        if not (removed or updated_ids):
+            if not failed:
+                print("No student records changed.")
+            return failed
+
+        students = sorted(by_id.values(), key=lambda x: int(x['student_id']))
+        save_json(self.data_path, students)
+        print(f"Patched {os.path.basename(self.data_path)}: {len(updated_ids)} updated, {len(removed)} removed.")
+
+        if self.evaluate:
+            self.patch_evaluations(evaluations, removed)
+        if self.similarity:
+            self.patch_similarity(students, scores, removed)
+        if self.convert and os.path.exists(EVAL_JSON_PATH) and os.path.exists(SIM_JSON_PATH):
+            from convert_to_excel import convert_json_to_excel
+            convert_json_to_excel()
+        return failed
+
+    def evaluate_student(self, record: dict) -> Optional[dict]:
+        """Returns the new evaluation entry, or None if the student has nothing to evaluate."""
+        from evaluate_results_llm import build_jobs, evaluate_single
+
+        requirements = self.requirements()
+        skipped = {}
+        jobs = build_jobs([record], requirements, skipped)
+        if not jobs:
+            return skipped.get(record["student_id"])
+        job = jobs[0]
+        print(f"--- Re-evaluating Student ID: {job['student_id']} (Task {job['task_type']}) ---")
+        evaluation = evaluate_single(job, requirements[f"TASK_{job['task_type']}"])
+        return {"task_type": job["task_type"], "evaluation": evaluation}
+
+    def score_student(self, record: dict) -> dict:
+        from calculate_similarity import score_student
+
+        result = score_student(self.model(), record)
+        print(f"  - Recalculated similarity for student {result['student_id']} (Task {result['task_type']}): {result['similarity_score']:.4f}")
+        return result
+
+    def patch_evaluations(self, evaluations: Dict[str, Optional[dict]], removed: List[str]) -> None:
+        eval_results = load_json(EVAL_JSON_PATH, {})
+        for student_id in removed:
+            eval_results.pop(student_id, None)
+        for student_id, result in evaluations.items():
+            if result is None:
+                eval_results.pop(student_id, None)
+            else:
+                eval_results[student_id] = result
+
+        save_json(EVAL_JSON_PATH, eval_results)
+        print(f"Patched {EVAL_JSON_PATH}.")
+
+    def patch_similarity(self, students: List[dict], changed: Dict[str, dict], removed: List[str]) -> None:
+        scores = {str(r["student_id"]): r for r in load_json(SIM_JSON_PATH, [])}
+        for student_id in removed:
+            scores.pop(student_id, None)
+        scores.update(changed)
+
+        # Keep the order of the data file, as calculate_similarity.py does.
+        ordered = [scores[str(s["student_id"])] for s in students if str(s["student_id"]) in scores]
+        save_json(SIM_JSON_PATH, ordered, indent=2)
+        print(f"Patched {SIM_JSON_PATH}.")
+
+def wait_until_quiet(directories: List[str], current: List[Dict[str, Tuple[int, int]]], debounce: float) -> List[Dict[str, Tuple[int, int]]]:
+    """Waits until no file has changed for `debounce` seconds, so bulk copies are handled as one update."""
+    while True:
+        time.sleep(debounce)
+        latest = [scan_directory(d) for d in directories]
+        if latest == current:
+            return latest
+        current = latest
+
+def main():
+    """
+    Watches the cleaned conversation and answer folders and incrementally
+    reprocesses only the students whose files were added, changed or removed.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_dir = os.path.dirname(script_dir)
+
+    parser = argparse.ArgumentParser(description="Watch the transcript folders and incrementally update all outputs.")
+    parser.add_argument("--data", default=os.path.join(base_dir, "final_project_data.json"),
+                        help="Data file to patch (default: ../final_project_data.json).")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between folder scans (default: 2).")
+    parser.add_argument("--debounce", type=float, default=5.0,
+                        help="Seconds without further changes before an update starts (default: 5).")
+    parser.add_argument("--no-evaluate", action="store_true", help="Do not re-run the LLM evaluation.")
+    parser.add_argument("--no-similarity", action="store_true", help="Do not recalculate similarity scores.")
+    parser.add_argument("--no-convert", action="store_true", help="Do not regenerate the CSV files.")
+    args = parser.parse_args()
+
+    answers_dir = os.path.join(base_dir, "Answers - Cleaned")
+    conversations_dir = os.path.join(base_dir, "Conversations - Cleaned")
+    directories = [answers_dir, conversations_dir]
+    for directory in directories:
+        if not os.path.isdir(directory):
+            print(f"Error: The directory was not found at '{directory}'")
+            return
+
+    updater = IncrementalUpdater(args.data, evaluate=not args.no_evaluate,
+                                 similarity=not args.no_similarity, convert=not args.no_convert)
+    snapshots = [scan_directory(d) for d in directories]
+    retry = set()
+    print(f"Watching '{os.path.basename(answers_dir)}' and '{os.path.basename(conversations_dir)}' (Ctrl+C to stop)...")
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            current = [scan_directory(d) for d in directories]
+            if current == snapshots and not retry:
+                continue
+            if current != snapshots:
+                current = wait_until_quiet(directories, current, args.debounce)
+
+            affected = set(retry)
+            for old, new in zip(snapshots, current):
+                for name in changed_files(old, new):
+                    student_id = extract_student_id(name)
+                    if student_id:
+                        affected.add(student_id)
+            snapshots = current
+            if not affected:
+                continue
+
+            print(f"\n--- Detected changes for {len(affected)} students: {', '.join(sorted(affected, key=int))} ---")
+            updated, retry = {}, set()
+            for student_id in affected:
+                try:
+                    updated[student_id] = rebuild_student(student_id, answers_dir, current[0], conversations_dir, current[1])
+                except Exception as e:
+                    # e.g. a half-copied or corrupt .docx; the next scan tries again.
+                    print(f"  - Could not read the files of Student ID {student_id}: {e}. Retrying on the next scan.")
+                    retry.add(student_id)
+            try:
+                retry |= updater.apply(updated)
+            except (Exception, SystemExit) as e:
+                print(f"  - Update failed: {e!r}. Retrying on the next scan.")
+                retry |= set(updated)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on SQLite's own locking only
+    fcntl = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    student_id TEXT PRIMARY KEY,
+    task_type TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    updated REAL
+)
+"""
+
+class WorkQueue:
+    """
+    A work queue of student IDs stored in a SQLite file on a shared filesystem.
+    Workers lease a student, extend the lease with heartbeats while working,
+    and store the result. Leases that are not renewed expire and are handed
+    to the next worker that asks for work.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # The rollback journal is used instead of WAL, which does not work on network filesystems.
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute("PRAGMA busy_timeout=60000")
+        with self.transaction():
+            self.conn.execute(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a write transaction while holding an exclusive lock on a sidecar
+        '.lock' file. SQLite's own locks are unreliable on some shared
+        filesystems, so every writer also takes this POSIX lock first.
+        """
+        lock_file = open(self.db_path + ".lock", "a+")
+        try:
+            if fcntl:
+                fcntl.lockf(lock_file, fcntl.LOCK_EX)
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        finally:
+            if fcntl:
+                fcntl.lockf(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def add_jobs(self, jobs: Iterable[Tuple[str, str]]) -> int:
+        """Adds (student_id, task_type) jobs. Existing jobs are left untouched, so this is safe to call from every worker."""
+        now = time.time()
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (student_id, task_type, updated) VALUES (?, ?, ?)",
+                [(str(student_id), task_type, now) for student_id, task_type in jobs],
+            )
+            return conn.total_changes - before
+
+    def lease(self, worker: str, lease_seconds: float) -> Optional[Tuple[str, bool]]:
+        """
+        Leases the next pending job, or a job whose lease has expired.
+        Returns (student_id, reclaimed) or None if nothing is available right now.
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute(
+                """SELECT student_id, status FROM jobs
+                   WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY attempts, student_id LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            student_id, status = row
+            conn.execute(
+                """UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                   attempts = attempts + 1, updated = ? WHERE student_id = ?""",
+                (worker, now + lease_seconds, now, student_id),
+            )
+            return student_id, status == "leased"
+
+    def heartbeat(self, worker: str, student_id: str, lease_seconds: float) -> bool:
+        """Extends a lease. Returns False if the lease was lost to another worker."""
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET lease_expires = ?, updated = ?
+                   WHERE student_id = ? AND worker = ? AND status = 'leased'""",
+                (now + lease_seconds, now, student_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, worker: str, student_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Stores a job's result. A result from a worker whose lease expired is
+        still accepted unless another worker has already finished the job.
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = 'done', worker = ?, lease_expires = NULL, result = ?, updated = ?
+                   WHERE student_id = ? AND status != 'done'""",
+                (worker, json.dumps(result, ensure_ascii=False), time.time(), student_id),
+            )
+            return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """Returns the number of jobs in each status."""
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        for status, n in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the stored results of all finished jobs, keyed by student ID."""
+        rows = self.conn.execute("SELECT student_id, result FROM jobs WHERE status = 'done'")
+        return {student_id: json.loads(result) for student_id, result in rows}